@@ -1,33 +1,47 @@
 from fastapi import APIRouter, HTTPException, Body, Depends
-from dotenv import load_dotenv
 import os
+import threading
+from collections import defaultdict
+from functools import lru_cache
 from typing import Optional
 from pathlib import Path
-import json
+import orjson
 from api.auth import get_current_user
 
 
-load_dotenv()  # Load .env file
-router = APIRouter()
+# Authentication applies to every route in this module; declaring it on the
+# router avoids a per-handler kwarg resolution for a value no handler uses.
+router = APIRouter(dependencies=[Depends(get_current_user, use_cache=True)])
 
+# Resolve the library layout once at import so handlers do not repeat the
+# env lookup and Path construction on every request.
+BASE_DIR = Path(os.getenv("BASE_DIR", "images"))
 
-def get_target_directory(base_dir: Path, directory: Optional[str]) -> Path:
+# One lock per metadata path so concurrent updates to the same file are
+# serialized instead of interleaving their read-modify-write cycles.
+_metadata_locks: defaultdict = defaultdict(threading.Lock)
+
+
+@lru_cache(maxsize=8)
+def get_target_directory(directory: Optional[str]) -> Path:
     """
     Determine the target directory based on the specified type.
 
+    The result is memoized — there are only three possible targets under
+    BASE_DIR, so repeat requests skip the Path construction.
+
     Args:
-        base_dir (Path): The base directory.
         directory (Optional[str]): Can be 'trash', 'picks', or None for regular.
 
     Returns:
         Path: The path to the target directory.
     """
     if directory == 'trash':
-        return base_dir / "trash"
+        return BASE_DIR / "trash"
     elif directory == 'picks':
-        return base_dir / "picks"
+        return BASE_DIR / "picks"
     else:
-        return base_dir
+        return BASE_DIR
 
 def load_metadata(json_file_path: Path) -> dict:
     """
@@ -39,23 +53,28 @@ def load_metadata(json_file_path: Path) -> dict:
     Returns:
         dict: The loaded metadata.
     """
-    with open(json_file_path, 'r') as f:
-        return json.load(f)
+    return orjson.loads(json_file_path.read_bytes())
 
 def save_metadata(json_file_path: Path, metadata: dict):
     """
-    Save metadata to a JSON file.
+    Save metadata to a JSON file atomically.
+
+    The bytes are written to a temporary file in the same directory and
+    moved into place with os.replace, so readers never observe a
+    partially written file even if the process dies mid-write. The dot
+    prefix keeps the temp file invisible to the directory scanners in
+    images.py, which skip dotfiles.
 
     Args:
         json_file_path (Path): The path to the JSON file.
         metadata (dict): The metadata to be saved.
     """
-    with open(json_file_path, 'w') as f:
-        json.dump(metadata, f)
+    tmp_path = json_file_path.with_name("." + json_file_path.name + ".tmp")
+    tmp_path.write_bytes(orjson.dumps(metadata))
+    os.replace(tmp_path, json_file_path)
 
 @router.put("/update-metadata", response_model=dict)
 def update_metadata(
-    current_user: dict = Depends(get_current_user),
     filename: str = Body(...),
     directory: Optional[str] = Body(None),  # Can be 'trash', 'picks', or None for regular
     notes: Optional[str] = Body(None),
@@ -65,7 +84,7 @@ def update_metadata(
     Update metadata for a specified file. Requires user authentication.
 
     This endpoint is protected and requires the caller to be authenticated before access is granted.
-    The current user information is retrieved using dependency injection with `get_current_user`.
+    Authentication is enforced by the router-level `get_current_user` dependency.
 
     Args:
         filename (str): The name of the file.
@@ -81,12 +100,11 @@ def update_metadata(
                        or if there's an error processing files.
     """
     try:
-        base_dir = Path(os.getenv("BASE_DIR"))
-        if not base_dir.exists() or not base_dir.is_dir():
+        if not BASE_DIR.exists() or not BASE_DIR.is_dir():
             raise HTTPException(status_code=404, detail="Base directory does not exist")
 
         # Determine the target directory
-        target_dir = get_target_directory(base_dir, directory)
+        target_dir = get_target_directory(directory)
 
         # Remove the file extension from filename before adding .json
         json_filename = Path(filename).stem + ".json"
@@ -96,17 +114,20 @@ def update_metadata(
         if not json_file_path.exists():
             raise HTTPException(status_code=404, detail="File not found")
 
-        # Load existing metadata
-        metadata = load_metadata(json_file_path)
+        # Serialize the read-modify-write cycle per file so concurrent
+        # updates to the same metadata cannot lose each other's fields.
+        with _metadata_locks[str(json_file_path)]:
+            # Load existing metadata
+            metadata = load_metadata(json_file_path)
 
-        # Update fields if provided
-        if notes is not None:
-            metadata['notes'] = notes
-        if prompt is not None:
-            metadata['prompt'] = prompt
+            # Update fields if provided
+            if notes is not None:
+                metadata['notes'] = notes
+            if prompt is not None:
+                metadata['prompt'] = prompt
 
-        # Write updated metadata back to file
-        save_metadata(json_file_path, metadata)
+            # Write updated metadata back to file
+            save_metadata(json_file_path, metadata)
 
         return {"message": "Metadata updated successfully"}
     except Exception as e:
@@ -1,56 +1,117 @@
 from fastapi import APIRouter, Depends, HTTPException
-from dotenv import load_dotenv
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 from pathlib import Path
-import json
+import orjson
 from api.auth import get_current_user
 
 
-load_dotenv()  # Load .env file
-router = APIRouter()
+# Authentication applies to every route in this module; declaring it on the
+# router avoids a per-handler kwarg resolution for a value no handler uses.
+router = APIRouter(dependencies=[Depends(get_current_user, use_cache=True)])
 
+# Resolve the library layout once at import so handlers do not repeat the
+# env lookup and Path construction on every request.
+BASE_DIR = Path(os.getenv("BASE_DIR", "images"))
+PICKS_DIR = BASE_DIR / "picks"
+TRASH_DIR = BASE_DIR / "trash"
 
-def ensure_json_exists(file: Path):
+# Worker count for parallel metadata reads; the GIL is released during file
+# I/O so a modest pool gives near-linear speedup on large directories.
+MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# In-memory metadata cache keyed by path string; each entry stores
+# (st_mtime_ns, st_size, metadata) so files edited on disk are re-parsed
+# while unchanged files are served from RAM across requests.
+_META_CACHE: Dict[str, tuple] = {}
+
+
+def _cache_metadata(json_path: Path, metadata: dict) -> None:
+    """
+    Record a freshly written metadata file in _META_CACHE.
+
+    Args:
+        json_path (Path): The path of the JSON metadata file just written.
+        metadata (dict): The parsed metadata the file now contains.
     """
-    Ensure each image has its own .json metadata file.
+    st = os.stat(json_path)
+    _META_CACHE[str(json_path)] = (st.st_mtime_ns, st.st_size, metadata)
+
+
+def load_metadata_cached(json_path: Path) -> dict:
+    """
+    Load metadata from a JSON file, serving unchanged files from _META_CACHE.
 
     Args:
-        file (Path): The path to the image file.
+        json_path (Path): The path to the JSON metadata file.
+
+    Returns:
+        dict: The parsed metadata.
+    """
+    key = str(json_path)
+    st = os.stat(json_path)
+    cached = _META_CACHE.get(key)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    metadata = orjson.loads(json_path.read_bytes())
+    _META_CACHE[key] = (st.st_mtime_ns, st.st_size, metadata)
+    return metadata
+
+
+def write_default_metadata(json_path: Path, image_name: str) -> dict:
     """
-    if not file.with_suffix('.json').exists():
-        default_metadata = {
-            "filename": file.name,
-            "trash": False,
-            "pick": False,
-            "rating": None,
-            "notes": "",
-            "prompt": ""
-        }
-        with open(file.with_suffix('.json'), 'w') as json_file:
-            json.dump(default_metadata, json_file)
+    Write a fresh metadata file with default values for an image.
 
+    Args:
+        json_path (Path): The path of the JSON metadata file to create.
+        image_name (str): The filename of the image the metadata describes.
 
-def update_json_if_needed(file: Path):
+    Returns:
+        dict: The default metadata that was written.
+    """
+    default_metadata = {
+        "filename": image_name,
+        "trash": False,
+        "pick": False,
+        "rating": None,
+        "notes": "",
+        "prompt": ""
+    }
+    json_path.write_bytes(orjson.dumps(default_metadata))
+    _cache_metadata(json_path, default_metadata)
+    return default_metadata
+
+
+def update_json_if_needed(json_path: Path) -> dict:
     """
     Update the JSON metadata if necessary.
 
     Args:
-        file (Path): The path to the image file.
+        json_path (Path): The path to the JSON metadata file.
+
+    Returns:
+        dict: The metadata, patched with defaults for any missing fields.
     """
-    json_path = file.with_suffix('.json')
-    # Load existing JSON data
-    with open(json_path, 'r') as json_file:
-        metadata = json.load(json_file)
+    metadata = load_metadata_cached(json_path)
+
+    # Find fields that are absent or unset; on a populated library this is
+    # usually empty, so the rewrite below is skipped entirely.
+    missing = [
+        key for key in ("trash", "pick", "rating", "notes", "prompt")
+        if key not in metadata or metadata[key] is None
+    ]
+    if not missing:
+        return metadata
 
-    # Ensure all fields are present and have default values if missing
-    for key in ["trash", "pick", "rating", "notes", "prompt"]:
-        if key not in metadata or metadata[key] is None:
-            metadata[key] = ""
+    for key in missing:
+        metadata[key] = ""
 
-    # Write back the updated JSON data
-    with open(json_path, 'w') as json_file:
-        json.dump(metadata, json_file)
+    # Write back the updated JSON data and refresh the cache entry so the
+    # rewrite does not invalidate it on the next request.
+    json_path.write_bytes(orjson.dumps(metadata))
+    _cache_metadata(json_path, metadata)
+    return metadata
 
 
 def collect_json_files(directory: Path) -> List[Path]:
@@ -65,10 +126,13 @@ def collect_json_files(directory: Path) -> List[Path]:
     """
     json_files = []
     if directory.exists() and directory.is_dir():
-        for file in directory.iterdir():
-            # Only collect .json metadata files
-            if file.is_file() and file.suffix == '.json':
-                json_files.append(file)
+        # os.scandir reuses the type information returned by the directory
+        # read itself, avoiding an extra stat per entry.
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                # Only collect .json metadata files
+                if entry.name.endswith('.json') and entry.is_file(follow_symlinks=False):
+                    json_files.append(Path(entry.path))
     return json_files
 
 
@@ -84,9 +148,11 @@ def process_json_metadata(json_files: List[Path], filter_func=None) -> List[Dict
         List[Dict[str, Any]]: A list of dictionaries containing image metadata.
     """
     image_objects = []
-    for json_file in json_files:
-        with open(json_file, 'r') as f:
-            metadata = json.load(f)
+    if not json_files:
+        return image_objects
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        for metadata in executor.map(load_metadata_cached, json_files):
             if filter_func is not None and not filter_func(metadata):
                 continue
             image_objects.append(metadata)
@@ -97,66 +163,100 @@ def check_directories():
     """
     Ensure all images have their .json metadata files.
     """
-    base_dir = Path(os.getenv("BASE_DIR"))
-    if not base_dir.exists() or not base_dir.is_dir():
+    if not BASE_DIR.exists() or not BASE_DIR.is_dir():
         return
 
-    for directory in [base_dir, base_dir / "picks", base_dir / "trash"]:
-        if directory.exists() and directory.is_dir():
-            for file in directory.iterdir():
-                if file.is_file() and not file.name.startswith('.') and file.suffix != '.json':
-                    ensure_json_exists(file)
+    for directory in [BASE_DIR, PICKS_DIR, TRASH_DIR]:
+        if not directory.exists() or not directory.is_dir():
+            continue
+
+        # One listing gives both the images and the existing JSON names, so
+        # missing sidecars are found by set difference instead of a stat
+        # per image.
+        with os.scandir(directory) as entries:
+            names = [
+                entry.name for entry in entries
+                if not entry.name.startswith('.') and entry.is_file(follow_symlinks=False)
+            ]
+        json_names = {name for name in names if name.endswith('.json')}
+
+        for name in names:
+            if name.endswith('.json'):
+                continue
+            json_name = name.rsplit('.', 1)[0] + '.json'
+            if json_name not in json_names:
+                write_default_metadata(directory / json_name, name)
 
 
 @router.get("/", response_model=List[Dict[str, Any]])
-def get_images(current_user: dict = Depends(get_current_user)):
+def get_images():
     """
     Retrieve a list of all image metadata. Requires user authentication.
 
     This endpoint is protected and requires the caller to be authenticated before access is granted.
-    The current user information is retrieved using dependency injection with `get_current_user`.
+    Authentication is enforced by the router-level `get_current_user` dependency.
 
     Returns:
         List[Dict[str, Any]]: A list of dictionaries containing image metadata.
     """
     try:
-        base_dir = Path(os.getenv("BASE_DIR"))
-        if not base_dir.exists() or not base_dir.is_dir():
+        if not BASE_DIR.exists() or not BASE_DIR.is_dir():
             raise HTTPException(status_code=404, detail="Base directory does not exist")
 
-        # Initialize list to collect JSON metadata files
-        json_files = []
+        image_objects = []
 
         print("Checking and updating JSON metadata...")
 
-        # Check and update each image's JSON file
-        for directory in [base_dir, base_dir / "picks", base_dir / "trash"]:
+        # Single pass per directory: list entries once, use the in-memory set
+        # of JSON names to create missing metadata without a stat per image,
+        # and collect the parsed metadata in the same sweep — the dicts
+        # returned by the update/create helpers go straight into the
+        # response, so unchanged sidecars cost one stat and zero parses.
+        for directory in [BASE_DIR, PICKS_DIR, TRASH_DIR]:
             if not directory.exists() or not directory.is_dir():
                 continue
 
-            for file in directory.iterdir():
-                # Only process image files (not .json metadata files)
-                if file.is_file() and not file.name.startswith('.') and file.suffix != '.json':
-                    ensure_json_exists(file)  # Create JSON file if it doesn't exist
-                    update_json_if_needed(file)  # Update JSON file with missing fields
-
-        # Collect all the JSON metadata files from various directories
-        for directory in [base_dir, base_dir / "picks", base_dir / "trash"]:
-            json_files.extend(collect_json_files(directory))
-
-        return process_json_metadata(json_files)
+            with os.scandir(directory) as entries:
+                names = [
+                    entry.name for entry in entries
+                    if not entry.name.startswith('.') and entry.is_file(follow_symlinks=False)
+                ]
+            json_names = {name for name in names if name.endswith('.json')}
+
+            matched = set()
+            for name in names:
+                if name.endswith('.json'):
+                    continue
+                json_name = name.rsplit('.', 1)[0] + '.json'
+                if json_name in matched:
+                    # Two images sharing a stem share one sidecar; it has
+                    # already been handled on the first image.
+                    continue
+                json_path = directory / json_name
+                if json_name in json_names:
+                    image_objects.append(update_json_if_needed(json_path))
+                else:
+                    image_objects.append(write_default_metadata(json_path, name))
+                matched.add(json_name)
+
+            # Sidecars whose image is gone still contribute their metadata,
+            # matching the previous behaviour of listing every JSON file.
+            orphans = [directory / json_name for json_name in json_names - matched]
+            image_objects.extend(process_json_metadata(orphans))
+
+        return image_objects
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
 
 @router.get("/trash", response_model=List[Dict[str, Any]])
-def get_trash_images(current_user: dict = Depends(get_current_user)):
+def get_trash_images():
     """
     Retrieve a list of trash image metadata. Requires user authentication.
 
     This endpoint is protected and requires the caller to be authenticated before access is granted.
-    The current user information is retrieved using dependency injection with `get_current_user`.
+    Authentication is enforced by the router-level `get_current_user` dependency.
 
     Returns:
         List[Dict[str, Any]]: A list of dictionaries containing trash image metadata.
@@ -166,11 +266,10 @@ def get_trash_images(current_user: dict = Depends(get_current_user)):
     """
 
     try:
-        base_dir = Path(os.getenv("BASE_DIR"))
-        if not base_dir.exists() or not base_dir.is_dir():
+        if not BASE_DIR.exists() or not BASE_DIR.is_dir():
             raise HTTPException(status_code=404, detail="Base directory does not exist")
 
-        json_files = collect_json_files(base_dir / "trash")
+        json_files = collect_json_files(TRASH_DIR)
         return process_json_metadata(json_files, lambda metadata: "trash" in metadata and metadata["trash"])
 
     except Exception as e:
@@ -178,22 +277,21 @@ def get_trash_images(current_user: dict = Depends(get_current_user)):
     
 
 @router.get("/picks", response_model=List[Dict[str, Any]])
-def get_pick_images(current_user: dict = Depends(get_current_user)):
+def get_pick_images():
     """
     Retrieve a list of pick image metadata. Requires user authentication.
 
     This endpoint is protected and requires the caller to be authenticated before access is granted.
-    The current user information is retrieved using dependency injection with `get_current_user`.
+    Authentication is enforced by the router-level `get_current_user` dependency.
 
     Returns:
         List[Dict[str, Any]]: A list of dictionaries containing pick image metadata.
     """
     try:
-        base_dir = Path(os.getenv("BASE_DIR"))
-        if not base_dir.exists() or not base_dir.is_dir():
+        if not BASE_DIR.exists() or not BASE_DIR.is_dir():
             raise HTTPException(status_code=404, detail="Base directory does not exist")
 
-        json_files = collect_json_files(base_dir / "picks")
+        json_files = collect_json_files(PICKS_DIR)
         return process_json_metadata(json_files, lambda metadata: "pick" in metadata and metadata["pick"])
 
     except Exception as e:
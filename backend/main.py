@@ -1,18 +1,35 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
+
+# Load environment variables from .env file before the api modules are
+# imported — they resolve BASE_DIR and the JWT settings at import time.
+load_dotenv()
+
 from api.images import router as images_router
+from api.move_images import BASE_DIR, PICKS_PATH, TRASH_PATH
 from api.move_images import router as move_images_router
 from api.auth import router as auth_router
 from api.image import router as image_update_router
 from api.export import router as export_router
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the library directories the handlers resolve at import time, so
+    no endpoint pays the first-request mkdir/stat cost. This is the single
+    place directories are created.
+    """
+    for directory in (BASE_DIR, TRASH_PATH, PICKS_PATH):
+        os.makedirs(directory, exist_ok=True)
+    yield
 
-# Load environment variables from .env file
-load_dotenv()
 
-BASE_DIR = os.getenv("BASE_DIR", "../images")
+# orjson serializes the large metadata lists several times faster than the
+# stdlib encoder behind the default JSONResponse.
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 @app.get("/")
 def read_root():